@@ -1,16 +1,63 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+import asyncio
+import orjson
 import threading
 import uvicorn
 from watcher import ProcessWatcher
 import os
+import shlex
+from typing import List, Optional
 
-app = FastAPI()
-watcher = ProcessWatcher("config.json")
+class ORJSONResponse(JSONResponse):
+    # fastapi.responses.ORJSONResponse is deprecated (and warns per response)
+    # in newer FastAPI releases, so render with orjson directly
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
 
-# Start monitoring in a background thread
-monitor_thread = threading.Thread(target=watcher.monitor_loop, daemon=True)
-monitor_thread.start()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.watcher = ProcessWatcher("config.json")
+
+    # The monitor loop only runs while serving, so importing this module stays
+    # side-effect free. It gets its own thread rather than asyncio.to_thread so
+    # it doesn't permanently occupy a default executor worker.
+    monitor_thread = threading.Thread(target=app.state.watcher.monitor_loop, daemon=True)
+    monitor_thread.start()
+    try:
+        yield
+    finally:
+        app.state.watcher.stop_monitor()
+        await asyncio.to_thread(monitor_thread.join)
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# On POSIX, git pull and the follow-up commit lookup run as one sh invocation.
+# cmd would %VAR%-expand the format string, so Windows runs the commands as
+# separate execs instead. The lookup is a single for-each-ref over the local
+# branches: the checked-out one is marked '*' and carries the commit fields and
+# its upstream (empty if there is none), separated by 0x1f.
+GIT_PULL_MARKER = "---COMMIT---"
+GIT_HEAD_REF_COMMAND = [
+    "git", "for-each-ref",
+    "--format=%(HEAD)%(objectname)%1f%(authorname)%1f%(subject)%1f%(upstream:short)",
+    "refs/heads",
+]
+# Prints the checked-out commit, then its upstream (e.g. "origin/main")
+GIT_LOCAL_HEAD_COMMAND = ["git", "rev-parse", "HEAD", "--abbrev-ref", "--symbolic-full-name", "@{u}"]
+GIT_PULL_SCRIPT = f"git pull && echo {GIT_PULL_MARKER} && {shlex.join(GIT_HEAD_REF_COMMAND)}"
+
+def _parse_head_ref(output: str) -> Optional[List[str]]:
+    # [hash, author, subject, upstream] for the checked-out branch
+    for line in output.splitlines():
+        if line.startswith('*'):
+            parts = line[1:].split('\x1f', 3)
+            if len(parts) == 4:
+                return parts
+    return None
 
 class ProcessActionResponse(BaseModel):
     name: str
@@ -18,58 +65,98 @@ class ProcessActionResponse(BaseModel):
     message: str
 
 @app.get("/processes")
-def list_processes():
-    return watcher.get_all_statuses()
+async def list_processes(request: Request):
+    statuses, etag = await run_in_threadpool(request.app.state.watcher.get_statuses_with_etag)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return ORJSONResponse(statuses, headers={"ETag": etag})
 
 @app.post("/processes/{name}/start", response_model=ProcessActionResponse)
-def start_process(name: str):
-    if watcher.start_process(name):
+async def start_process(name: str, request: Request):
+    name = request.app.state.watcher.canonical_name(name)
+    if await run_in_threadpool(request.app.state.watcher.start_process, name):
         return {"name": name, "status": "success", "message": "Process started"}
     else:
         raise HTTPException(status_code=500, detail="Failed to start process")
 
 @app.post("/processes/{name}/stop", response_model=ProcessActionResponse)
-def stop_process(name: str):
-    if watcher.stop_process(name):
+async def stop_process(name: str, request: Request):
+    name = request.app.state.watcher.canonical_name(name)
+    if await run_in_threadpool(request.app.state.watcher.stop_process, name):
         return {"name": name, "status": "success", "message": "Process stopped"}
     else:
         raise HTTPException(status_code=500, detail="Failed to stop process or process not running")
 
 @app.post("/processes/{name}/restart", response_model=ProcessActionResponse)
-def restart_process(name: str):
-    if watcher.restart_process(name):
+async def restart_process(name: str, request: Request):
+    name = request.app.state.watcher.canonical_name(name)
+    if await run_in_threadpool(request.app.state.watcher.restart_process, name):
         return {"name": name, "status": "success", "message": "Process restarted"}
     else:
         raise HTTPException(status_code=500, detail="Failed to restart process")
 
 @app.post("/processes/{name}/git-pull")
-def git_pull(name: str):
-    result = watcher.run_command(name, ["git", "pull"])
-    
+async def git_pull(name: str, request: Request):
+    name = request.app.state.watcher.canonical_name(name)
+    watcher = request.app.state.watcher
+
+    # If the upstream branch still points at the commit we last pulled, and the
+    # checkout is still on it, skip the full fetch: ls-remote only exchanges
+    # refs. The cache only holds entries whose branch had an upstream, e.g.
+    # ("<hash>", "origin/deploy").
+    known = watcher.git_heads.get(name)
+    if known:
+        known_head, upstream = known
+        remote, _, branch = upstream.partition('/')
+        remote_result, local_result = await asyncio.gather(
+            watcher.run_command_async(name, ["git", "ls-remote", remote, f"refs/heads/{branch}"]),
+            watcher.run_command_async(name, GIT_LOCAL_HEAD_COMMAND),
+        )
+        # The checkout may have been reset, or switched branch, since the pull
+        if not local_result["success"] or local_result["output"].split() != [known_head, upstream]:
+            watcher.git_heads.pop(name, None)
+        elif remote_result["success"] and remote_result["output"].split()[:1] == [known_head]:
+            return {"name": name, "status": "success", "output": "Already up to date.\n", "error": ""}
+
+    if os.name == 'nt':
+        result = await watcher.run_command_async(name, ["git", "pull"])
+        pull_output, head_output = result["output"], ""
+        # An up-to-date pull leaves a cached entry valid, so skip the lookup
+        if result["success"] and ("Already up to date" not in pull_output or name not in watcher.git_heads):
+            ref_result = await watcher.run_command_async(name, GIT_HEAD_REF_COMMAND)
+            if ref_result["success"]:
+                head_output = ref_result["output"]
+    else:
+        result = await watcher.run_command_async(name, ["sh", "-c", GIT_PULL_SCRIPT])
+        pull_output, _, head_output = result["output"].partition(GIT_PULL_MARKER)
+
     response = {
         "name": name,
         "status": "success" if result["success"] else "error",
-        "output": result["output"],
+        "output": pull_output,
         "error": result["error"]
     }
-    
-    if result["success"] and "Already up to date" not in result["output"]:
-        log_result = watcher.run_command(name, ["git", "log", "-1", "--format=%H|%an|%s"])
-        if log_result["success"]:
-            parts = log_result["output"].strip().split('|', 2)
-            if len(parts) == 3:
+
+    if result["success"] and head_output:
+        head = _parse_head_ref(head_output)
+        if head and head[3]:
+            watcher.git_heads[name] = (head[0], head[3])
+        else:
+            watcher.git_heads.pop(name, None)
+        if head:
+            if "Already up to date" not in pull_output:
                 response["latest_commit"] = {
-                    "hash": parts[0],
-                    "author": parts[1],
-                    "message": parts[2]
+                    "hash": head[0],
+                    "author": head[1],
+                    "message": head[2]
                 }
-                
+
     return response
 
 @app.post("/config/reload")
-def reload_config():
-    watcher.load_config()
+async def reload_config(request: Request):
+    await run_in_threadpool(request.app.state.watcher.load_config)
     return {"status": "success", "message": "Configuration reloaded"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="asyncio" if os.name == 'nt' else "uvloop", http="httptools", access_log=False)
@@ -1,43 +1,63 @@
-import aiohttp
+"""Asynchronous client for the Process Watcher API.
+
+The client keeps a single ``httpx.AsyncClient`` with a bounded connection pool
+for its lifetime so consecutive calls reuse keep-alive connections. Use it as
+an async context manager so the pool is closed on exit:
+
+    async with ProcessWatcherClient("http://localhost:8110") as client:
+        statuses = await client.get_processes()
+
+Without the context manager, release the pool with ``await client.aclose()``.
+"""
+import httpx
 import asyncio
 from typing import Dict, Any
 
 class ProcessWatcherClient:
     def __init__(self, base_url: str = "http://localhost:8110"):
         self.base_url = base_url.rstrip('/')
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=10, max_connections=32),
+            timeout=30.0,
+        )
+
+    async def __aenter__(self) -> "ProcessWatcherClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
 
     async def get_processes(self) -> Dict[str, str]:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{self.base_url}/processes") as response:
-                response.raise_for_status()
-                return await response.json()
+        response = await self._client.get("/processes")
+        response.raise_for_status()
+        return response.json()
 
     async def start_process(self, name: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.base_url}/processes/{name}/start") as response:
-                response.raise_for_status()
-                return await response.json()
+        response = await self._client.post(f"/processes/{name}/start")
+        response.raise_for_status()
+        return response.json()
 
     async def stop_process(self, name: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.base_url}/processes/{name}/stop") as response:
-                response.raise_for_status()
-                return await response.json()
+        response = await self._client.post(f"/processes/{name}/stop")
+        response.raise_for_status()
+        return response.json()
 
     async def restart_process(self, name: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.base_url}/processes/{name}/restart") as response:
-                response.raise_for_status()
-                return await response.json()
+        response = await self._client.post(f"/processes/{name}/restart")
+        response.raise_for_status()
+        return response.json()
 
     async def git_pull(self, name: str) -> Dict[str, Any]:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.base_url}/processes/{name}/git-pull") as response:
-                response.raise_for_status()
-                return await response.json()
+        response = await self._client.post(f"/processes/{name}/git-pull")
+        response.raise_for_status()
+        return response.json()
 
     async def reload_config(self) -> Dict[str, Any]:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(f"{self.base_url}/config/reload") as response:
-                response.raise_for_status()
-                return await response.json()
+        response = await self._client.post("/config/reload")
+        response.raise_for_status()
+        return response.json()
@@ -10,9 +10,17 @@ def main():
     Entry point for the Process Watcher application.
     Starts the Uvicorn server with the FastAPI app.
     """
-    # The monitor thread is already started when importing 'app' from 'api'
-    # because of the module-level code in api.py.
-    uvicorn.run(app, host=os.getenv("SERVER_HOST", "0.0.0.0"), port=int(os.getenv("SERVER_PORT", 8110)))
+    # The monitor loop is started by the app's lifespan handler once the
+    # server begins serving, and stopped again on shutdown.
+    # uvloop has no Windows support, so fall back to the stock asyncio loop there
+    uvicorn.run(
+        app,
+        host=os.getenv("SERVER_HOST", "0.0.0.0"),
+        port=int(os.getenv("SERVER_PORT", 8110)),
+        loop="asyncio" if os.name == 'nt' else "uvloop",
+        http="httptools",
+        access_log=False,
+    )
 
 if __name__ == "__main__":
     main()
@@ -6,7 +6,7 @@ try:
     import psutil
     import fastapi
     import uvicorn
-    import aiohttp
+    import httpx
     from watcher import ProcessWatcher
     from api import app
     from client import ProcessWatcherClient
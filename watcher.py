@@ -1,40 +1,218 @@
-import json
+import asyncio
+import functools
+import hashlib
+import locale
+import orjson
 import os
 import subprocess
 import time
 import psutil
 import logging
-from typing import List, Dict, Optional, Any
+import select
+import sys
+from typing import List, Dict, Optional, Any, Tuple, Iterator, Callable
 import threading
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+from fastrlock.rlock import FastRLock as RLock
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# How long (in seconds) an is_running result may be reused before re-probing
+_IS_RUNNING_TTL = 1.0
+
+# How long (in seconds) the full status map served by GET /processes is reused
+_STATUSES_TTL = 1.0
+
+# Lower bound (in seconds) between monitor ticks when woken early, so a
+# crash-looping process is not respawned in a tight loop
+_MIN_TICK_INTERVAL = 1.0
+
+# ({normalized exe path: pid}, {config name: pid matched via process_match})
+# from one psutil sweep
+ProcessSnapshot = Tuple[Dict[str, int], Dict[str, int]]
+
+def _normalize_path(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+def _write_pid_file(path: str, pid: int):
+    # Leave the file alone if it already holds this PID
+    try:
+        with open(path, 'r') as f:
+            if f.read().strip() == str(pid):
+                return
+    except (OSError, ValueError):
+        pass
+
+    # Write to a sibling temp file and swap it in so readers never see a
+    # truncated or partially written PID
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(pid))
+    os.replace(tmp_path, path)
+
+def _decode_output(data: bytes) -> str:
+    # Match subprocess.run(text=True): locale encoding, universal newlines
+    text = data.decode(locale.getpreferredencoding(False))
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def _reap_child(pid: int):
+    # Collect the exit status if the process was our own child, so it does
+    # not linger as a zombie that psutil still reports as existing
+    try:
+        os.waitpid(pid, os.WNOHANG)
+    except ChildProcessError:
+        pass
+
+def _wait_pid_event(pid: int, timeout: float) -> bool:
+    """Wait up to `timeout` seconds for `pid` to exit, returning True if it did.
+
+    Sleeps on a pidfd (Linux) or kqueue (BSD/macOS) exit notification where
+    available, falling back to psutil's polling wait elsewhere.
+    """
+    if hasattr(os, 'pidfd_open'):
+        try:
+            fd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            fd = None  # Kernel without pidfd support
+
+        if fd is not None:
+            try:
+                poller = select.poll()
+                poller.register(fd, select.POLLIN)
+                exited = bool(poller.poll(timeout * 1000))
+            finally:
+                os.close(fd)
+            if exited:
+                _reap_child(pid)
+            return exited
+
+    elif hasattr(select, 'kqueue'):
+        kq = select.kqueue()
+        try:
+            event = select.kevent(pid, filter=select.KQ_FILTER_PROC, flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT, fflags=select.KQ_NOTE_EXIT)
+            try:
+                exited = bool(kq.control([event], 1, timeout))
+            except ProcessLookupError:
+                exited = True
+        finally:
+            kq.close()
+        if exited:
+            _reap_child(pid)
+        return exited
+
+    try:
+        psutil.Process(pid).wait(timeout=timeout)
+    except psutil.TimeoutExpired:
+        return False
+    except psutil.NoSuchProcess:
+        pass
+    return True
+
 class ProcessWatcher:
     def __init__(self, config_path: str):
         self.config_path = config_path
         self.processes: List[Dict] = []
+        self._by_name: Dict[str, Dict] = {}
+        # (process_match, name) pairs, plus an Aho-Corasick automaton over the
+        # same strings when pyahocorasick is available
+        self._match_strings: List[Tuple[str, str]] = []
+        self._ac = None
+        # psutil attributes the full sweep needs; exe/cmdline are only read
+        # when some config checks executable_path/process_match
+        self._snapshot_attrs: List[str] = ['pid']
         self.running_processes: Dict[str, int] = {}
+        # Guards running_processes only. Unlike self.lock it is never held
+        # across process I/O, so status reads don't wait out a slow stop.
+        self._tracking_lock = threading.Lock()
         self.stopped_processes: set = set()
-        self.lock = threading.RLock()
+        self._is_running_cache: Dict[str, Tuple[float, bool]] = {}
+        # (computed at, statuses, ETag) for get_statuses_with_etag
+        self._statuses_cache: Tuple[float, Dict[str, str], str] = (0.0, {}, "")
+        # Bumped whenever cached statuses are invalidated; a probe that started
+        # under an older generation doesn't write its result back. The lock
+        # makes that check-and-write atomic against an invalidation, and is
+        # never held across a probe.
+        self._status_generation = 0
+        self._status_cache_lock = threading.Lock()
+        # (local HEAD commit, upstream ref such as "origin/main") per process as
+        # of its last successful git pull
+        self.git_heads: Dict[str, Tuple[str, str]] = {}
+        self.lock = RLock()
+        self._shutdown = threading.Event()
+        self._wakeup = threading.Event()
+        self._config_mtime_ns = -1
         self.load_config()
 
     def load_config(self):
-        if not os.path.exists(self.config_path):
+        try:
+            st = os.stat(self.config_path)
+        except FileNotFoundError:
             logger.error(f"Config file not found: {self.config_path}")
             return
 
+        # Skip the read and parse entirely if the file hasn't been modified
+        if st.st_mtime_ns == self._config_mtime_ns:
+            logger.info("Configuration unchanged, skipping reload.")
+            return
+
         try:
-            with open(self.config_path, 'r') as f:
-                new_config = json.load(f)
-            
+            with open(self.config_path, 'rb') as f:
+                new_config = orjson.loads(f.read())
+
+            # Intern names so lookups in the tracking dicts/sets hit the identity
+            # fast path, and normalize executable paths once here rather than
+            # on every lookup
+            for p in new_config:
+                p['name'] = sys.intern(p['name'])
+                # An empty path means "don't check"; normpath('') would give '.'
+                if p.get('executable_path'):
+                    p['_exe_norm'] = _normalize_path(p['executable_path'])
+
+            # Lookups by name resolve to the first entry with that name
+            by_name: Dict[str, Dict] = {}
+            for p in new_config:
+                if by_name.setdefault(p['name'], p) is not p:
+                    logger.warning(f"Duplicate process name '{p['name']}' in config; using the first entry")
+
+            match_strings = [(p['process_match'], p['name']) for p in new_config if p.get('process_match')]
+            ac = self._build_automaton(match_strings)
+            snapshot_attrs = ['pid']
+            if any('_exe_norm' in p for p in new_config):
+                snapshot_attrs.append('exe')
+            if match_strings:
+                snapshot_attrs.append('cmdline')
+
             with self.lock:
+                # A cached HEAD describes the old checkout once cwd moves
+                for p in new_config:
+                    old = self._by_name.get(p['name'])
+                    if old is not None and old.get('cwd', '.') != p.get('cwd', '.'):
+                        self.git_heads.pop(p['name'], None)
                 self.processes = new_config
+                self._by_name = by_name
+                self._match_strings = match_strings
+                self._ac = ac
+                self._snapshot_attrs = snapshot_attrs
+                with self._status_cache_lock:
+                    self._status_generation += 1
+                    self._is_running_cache.clear()
+                    self._statuses_cache = (0.0, {}, "")
+                self._config_mtime_ns = st.st_mtime_ns
+            self.wakeup()
             logger.info("Configuration loaded.")
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"Error decoding JSON config: {e}")
 
-    def check_pid_file(self, pid_file: str, match_string: str = None, executable_path: str = None) -> Optional[int]:
+    def check_pid_file(self, pid_file: str, match_string: str = None, exe_norm: str = None) -> Optional[int]:
+        # exe_norm is an executable path already passed through _normalize_path
         if os.path.exists(pid_file):
             try:
                 with open(pid_file, 'r') as f:
@@ -43,8 +221,9 @@ class ProcessWatcher:
                     try:
                         proc = psutil.Process(pid)
                         # Verify executable path if provided
-                        if executable_path:
-                            if not proc.exe() or os.path.normpath(executable_path).lower() != os.path.normpath(proc.exe()).lower():
+                        if exe_norm:
+                            exe = proc.exe()
+                            if not exe or _normalize_path(exe) != exe_norm:
                                 return None
                         
                         # Verify match string if provided
@@ -60,10 +239,20 @@ class ProcessWatcher:
                 pass
         return None
 
-    def find_process_by_match(self, match_string: str, executable_path: str = None) -> Optional[int]:
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'exe']):
+    def find_process_by_match(self, match_string: Optional[str], exe_norm: Optional[str]) -> Optional[int]:
+        # exe_norm is an executable path already passed through _normalize_path.
+        # Only fetch the attributes we compare against; exe and cmdline each
+        # cost a separate /proc read per process on Linux
+        if match_string is None:
+            attrs = ['pid', 'exe']
+        elif exe_norm is None:
+            attrs = ['pid', 'cmdline']
+        else:
+            attrs = ['pid', 'cmdline', 'exe']
+
+        for proc in psutil.process_iter(attrs):
             try:
-                if executable_path and proc.info['exe'] and os.path.normpath(executable_path).lower() == os.path.normpath(proc.info['exe']).lower():
+                if exe_norm and proc.info['exe'] and _normalize_path(proc.info['exe']) == exe_norm:
                      return proc.info['pid']
                 
                 if match_string:
@@ -77,14 +266,95 @@ class ProcessWatcher:
                 continue
         return None
 
+    def _build_automaton(self, match_strings: List[Tuple[str, str]]):
+        if ahocorasick is None or not match_strings:
+            return None
+
+        ac = ahocorasick.Automaton()
+        for match_string, name in match_strings:
+            # Several configs may share a match string, so each word maps to all of them
+            ac.add_word(match_string, ac.get(match_string, ()) + (name,))
+        ac.make_automaton()
+        return ac
+
+    def _match_cmdline(self, full_cmd: str) -> Iterator[str]:
+        # Names of every configured process whose process_match occurs in full_cmd
+        ac = self._ac
+        if ac is not None:
+            for _, names in ac.iter(full_cmd):
+                yield from names
+        else:
+            for match_string, name in self._match_strings:
+                if match_string in full_cmd:
+                    yield name
+
+    def _snapshot_processes(self) -> ProcessSnapshot:
+        # One sweep over the system processes, indexed so each configured
+        # process can be matched in memory instead of re-iterating psutil.
+        # Each cmdline is run through the matcher once for all configs. Only
+        # the attributes some config checks are fetched; the rest are absent
+        # from proc.info.
+        by_exe: Dict[str, int] = {}
+        by_match: Dict[str, int] = {}
+        for proc in psutil.process_iter(self._snapshot_attrs):
+            try:
+                if proc.info.get('exe'):
+                    by_exe.setdefault(_normalize_path(proc.info['exe']), proc.info['pid'])
+                if proc.info.get('cmdline'):
+                    for name in self._match_cmdline(" ".join(proc.info['cmdline'])):
+                        by_match.setdefault(name, proc.info['pid'])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        return by_exe, by_match
+
+    def _match_snapshot(self, snapshot: ProcessSnapshot, name: str, exe_norm: str = None) -> Optional[int]:
+        by_exe, by_match = snapshot
+        if exe_norm:
+            pid = by_exe.get(exe_norm)
+            if pid is not None:
+                return pid
+        return by_match.get(name)
+
+    def _cached_is_running(self, name: str) -> Optional[bool]:
+        entry = self._is_running_cache.get(name)
+        if entry and time.monotonic() - entry[0] < _IS_RUNNING_TTL:
+            return entry[1]
+        return None
+
     def is_running(self, name: str) -> bool:
-        # Check if we are tracking it internally
-        if name in self.running_processes:
-            pid = self.running_processes[name]
+        running = self._cached_is_running(name)
+        if running is not None:
+            return running
+
+        return self._probe_and_cache(name)
+
+    def is_running_from_snapshot(self, name: str, get_snapshot: Callable[[], ProcessSnapshot]) -> bool:
+        # get_snapshot is only called if the name falls through to matching,
+        # so callers can share one lazily built sweep across names
+        return self._probe_and_cache(name, get_snapshot)
+
+    def _probe_and_cache(self, name: str, get_snapshot: Optional[Callable[[], ProcessSnapshot]] = None) -> bool:
+        now = time.monotonic()
+        generation = self._status_generation
+        running = self._probe_running(name, get_snapshot)
+        # A start/stop that finished during the probe makes the result stale
+        with self._status_cache_lock:
+            if generation == self._status_generation:
+                self._is_running_cache[name] = (now, running)
+        return running
+
+    def _probe_running(self, name: str, get_snapshot: Optional[Callable[[], ProcessSnapshot]] = None) -> bool:
+        # Check if we are tracking it internally. This also runs unlocked from
+        # the monitor thread, so the entry is read and removed under the
+        # tracking lock.
+        with self._tracking_lock:
+            pid = self.running_processes.get(name)
+        if pid is not None:
             if psutil.pid_exists(pid):
                 return True
-            else:
-                del self.running_processes[name]
+            with self._tracking_lock:
+                if self.running_processes.get(name) == pid:
+                    del self.running_processes[name]
         
         # Check if we can find it via PID file or matching
         config = self.get_config_by_name(name)
@@ -93,25 +363,36 @@ class ProcessWatcher:
 
         pid = None
         if 'pid_file' in config:
-            pid = self.check_pid_file(config['pid_file'], config.get('process_match'), config.get('executable_path'))
-        
-        if pid is None and 'process_match' in config:
-             pid = self.find_process_by_match(config['process_match'], config.get('executable_path'))
+            pid = self.check_pid_file(config['pid_file'], config.get('process_match'), config.get('_exe_norm'))
         
-        if pid is None and 'executable_path' in config and 'process_match' not in config:
-             pid = self.find_process_by_match(None, config['executable_path'])
+        if pid is None and ('process_match' in config or '_exe_norm' in config):
+            if get_snapshot is not None:
+                pid = self._match_snapshot(get_snapshot(), name, config.get('_exe_norm'))
+            else:
+                pid = self.find_process_by_match(config.get('process_match'), config.get('_exe_norm'))
 
         return pid is not None
 
     def get_config_by_name(self, name: str) -> Optional[Dict]:
-        for p in self.processes:
-            if p['name'] == name:
-                return p
-        return None
+        return self._by_name.get(name)
+
+    def canonical_name(self, name: str) -> str:
+        # Swap an externally supplied name for the interned one from config.
+        # Unknown names are returned as-is rather than interned, so arbitrary
+        # API input can't grow the intern table.
+        config = self._by_name.get(name)
+        return config['name'] if config else name
+
+    def _invalidate_status(self, name: str):
+        with self._status_cache_lock:
+            self._status_generation += 1
+            self._is_running_cache.pop(name, None)
+            self._statuses_cache = (0.0, {}, "")
 
     def start_process(self, name: str) -> bool:
         with self.lock:
-            if self.is_running(name):
+            # Probe directly: a cached result may predate a stop that is in progress
+            if self._probe_running(name):
                 logger.info(f"Process '{name}' is already running.")
                 return True
 
@@ -165,12 +446,15 @@ class ProcessWatcher:
                     # Fallback for non-Windows (standard Popen)
                     proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, start_new_session=True)
                     pid = proc.pid
+                    threading.Thread(target=self._wait_for_exit, args=(proc,), daemon=True).start()
 
-                self.running_processes[name] = pid
+                with self._tracking_lock:
+                    self.running_processes[name] = pid
+                self._invalidate_status(name)
+                self.wakeup()
                 
                 if 'pid_file' in config:
-                    with open(config['pid_file'], 'w') as f:
-                        f.write(str(pid))
+                    _write_pid_file(config['pid_file'], pid)
                 
                 logger.info(f"Process '{name}' started with PID {pid}")
                 return True
@@ -183,11 +467,13 @@ class ProcessWatcher:
             pids_to_kill = set()
             
             # 1. Internal tracking
-            if name in self.running_processes:
-                pids_to_kill.add(self.running_processes[name])
-                del self.running_processes[name]
+            with self._tracking_lock:
+                tracked_pid = self.running_processes.pop(name, None)
+            if tracked_pid is not None:
+                pids_to_kill.add(tracked_pid)
             
             self.stopped_processes.add(name)
+            self.wakeup()
             
             # 2. Config based lookup (PID file, match, etc)
             # We check this even if we found an internal PID, because they might differ
@@ -196,18 +482,19 @@ class ProcessWatcher:
             if config:
                 pid_from_lookup = None
                 if 'pid_file' in config:
-                    pid_from_lookup = self.check_pid_file(config['pid_file'], config.get('process_match'), config.get('executable_path'))
+                    pid_from_lookup = self.check_pid_file(config['pid_file'], config.get('process_match'), config.get('_exe_norm'))
                 
                 if pid_from_lookup is None and 'process_match' in config:
-                    pid_from_lookup = self.find_process_by_match(config['process_match'], config.get('executable_path'))
+                    pid_from_lookup = self.find_process_by_match(config['process_match'], config.get('_exe_norm'))
 
-                if pid_from_lookup is None and 'executable_path' in config and 'process_match' not in config:
-                    pid_from_lookup = self.find_process_by_match(None, config['executable_path'])
+                if pid_from_lookup is None and '_exe_norm' in config and 'process_match' not in config:
+                    pid_from_lookup = self.find_process_by_match(None, config['_exe_norm'])
                 
                 if pid_from_lookup:
                     pids_to_kill.add(pid_from_lookup)
 
             if not pids_to_kill:
+                self._invalidate_status(name)
                 logger.info(f"Process '{name}' is not running.")
                 return False
 
@@ -216,9 +503,7 @@ class ProcessWatcher:
                 try:
                     p = psutil.Process(pid)
                     p.terminate()
-                    try:
-                        p.wait(timeout=5)
-                    except psutil.TimeoutExpired:
+                    if not _wait_pid_event(pid, 5):
                         p.kill()
                     logger.info(f"Process '{name}' (PID {pid}) stopped.")
                     success = True
@@ -227,7 +512,10 @@ class ProcessWatcher:
                     success = True
                 except Exception as e:
                     logger.error(f"Failed to kill process '{name}' (PID {pid}): {e}")
-            
+
+            # Only now that the kills have finished; a status read while the
+            # process was still exiting may have cached it as running
+            self._invalidate_status(name)
             return success
 
     def restart_process(self, name: str) -> bool:
@@ -237,26 +525,88 @@ class ProcessWatcher:
 
     def monitor_loop(self):
         logger.info("Starting monitor loop...")
-        while True:
-            with self.lock:
-                for p_config in self.processes:
-                    name = p_config['name']
-                    if not p_config.get('enabled', True):
-                        continue
+        while not self._shutdown.is_set():
+            tick_started = time.monotonic()
+            try:
+                self._monitor_tick()
+            except Exception:
+                # Keep supervising; one failed tick must not end the loop
+                logger.exception("Monitor tick failed")
+
+            if self._wakeup.wait(5):
+                self._wakeup.clear()
+                self._shutdown.wait(max(0.0, tick_started + _MIN_TICK_INTERVAL - time.monotonic()))
+        logger.info("Monitor loop stopped.")
+
+    def _monitor_tick(self):
+        # Only copy the config under the lock; the psutil sweep and the
+        # per-process checks run without blocking API callers
+        with self.lock:
+            processes = list(self.processes)
+            stopped = self.stopped_processes.copy()
 
+        # Most names are settled by internal tracking or their PID file, so the
+        # full sweep is only taken once some name actually needs it
+        get_snapshot = functools.cache(self._snapshot_processes)
+        for p_config in processes:
+            name = p_config['name']
+            if not p_config.get('enabled', True):
+                continue
+
+            if name in stopped:
+                continue
+
+            if not self.is_running_from_snapshot(name, get_snapshot):
+                with self.lock:
+                    # It may have been stopped manually since the copy was taken
                     if name in self.stopped_processes:
                         continue
-                        
-                    if not self.is_running(name):
-                        logger.warning(f"Process '{name}' is down. Restarting...")
-                        self.start_process(name)
-            time.sleep(5)
+                    logger.warning(f"Process '{name}' is down. Restarting...")
+                    self.start_process(name)
+
+    def _wait_for_exit(self, proc: subprocess.Popen):
+        # Block until the child exits, which also reaps it (a zombie would
+        # still look alive to psutil), then have the monitor rescan at once
+        proc.wait()
+        self.wakeup()
+
+    def wakeup(self):
+        # Cut the monitor loop's current wait short and rescan now
+        self._wakeup.set()
+
+    def stop_monitor(self):
+        self._shutdown.set()
+        self.wakeup()
 
     def get_all_statuses(self) -> Dict[str, str]:
+        return self.get_statuses_with_etag()[0]
+
+    def get_statuses_with_etag(self) -> Tuple[Dict[str, str], str]:
+        computed_at, statuses, etag = self._statuses_cache
+        if etag and time.monotonic() - computed_at < _STATUSES_TTL:
+            return dict(statuses), etag
+
+        computed_at = time.monotonic()
+        generation = self._status_generation
+        statuses = self._compute_statuses()
+        etag = '"' + hashlib.blake2b(orjson.dumps(statuses), digest_size=16).hexdigest() + '"'
+        with self._status_cache_lock:
+            if generation == self._status_generation:
+                self._statuses_cache = (computed_at, statuses, etag)
+        return dict(statuses), etag
+
+    def _compute_statuses(self) -> Dict[str, str]:
         statuses = {}
+        # One shared sweep, taken only if an expired name isn't settled by
+        # internal tracking or its PID file
+        get_snapshot = functools.cache(self._snapshot_processes)
         for p in self.processes:
             name = p['name']
-            if self.is_running(name):
+            running = self._cached_is_running(name)
+            if running is None:
+                running = self.is_running_from_snapshot(name, get_snapshot)
+
+            if running:
                 statuses[name] = "Running"
             elif name in self.stopped_processes:
                 statuses[name] = "Stopped (Manual)"
@@ -288,3 +638,27 @@ class ProcessWatcher:
         except Exception as e:
             logger.error(f"Failed to run command for '{name}': {e}")
             return {"success": False, "output": "", "error": str(e)}
+
+    async def run_command_async(self, name: str, command: List[str]) -> Dict[str, Any]:
+        config = self.get_config_by_name(name)
+        if not config:
+            return {"success": False, "output": f"Process '{name}' not found", "error": ""}
+
+        cwd = config.get('cwd', '.')
+        try:
+            logger.info(f"Running command {command} for '{name}' in {cwd}")
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate()
+            return {
+                "success": proc.returncode == 0,
+                "output": _decode_output(stdout),
+                "error": _decode_output(stderr)
+            }
+        except Exception as e:
+            logger.error(f"Failed to run command for '{name}': {e}")
+            return {"success": False, "output": "", "error": str(e)}